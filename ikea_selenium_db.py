@@ -8,11 +8,16 @@ import smtplib
 import email.mime.text
 import email.mime.multipart
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import threading
 import logging
 import json
 import hashlib
+import re
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 
 # Selenium imports
 from selenium import webdriver
@@ -28,21 +33,61 @@ from webdriver_manager.chrome import ChromeDriverManager
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Runs entirely in the browser so one WebDriver round-trip returns every event,
+# instead of 3-4 find_element calls per candidate element
+EXTRACT_EVENTS_JS = """
+return Array.from(document.querySelectorAll('ul[aria-label^="All events at"] > li')).map(function (li) {
+    var h3 = li.querySelector('h3');
+    var p = li.querySelector('p');
+    var a = li.querySelector('a');
+    return {
+        title: h3 ? h3.innerText : '',
+        date: p ? p.innerText : '',
+        url: a ? a.href : ''
+    };
+});
+"""
+
+# Keyword screen for the fallback strategies, compiled once at import
+EVENT_KEYWORD_RE = re.compile(r'BINGO|Warehouse|workshop|class', re.IGNORECASE)
+
+# Built once at import instead of re-multiplying per event in send_email
+EMAIL_SEPARATOR = "-" * 45 + "\n\n"
+
+# Lazily created so a missing DATABASE_URL still degrades gracefully
+_connection_pool = None
+
 def get_database_connection():
-    """Get database connection."""
+    """Get a database connection from the shared pool."""
+    global _connection_pool
     try:
         # Use Render's DATABASE_URL environment variable
         database_url = os.getenv('DATABASE_URL')
         if not database_url:
             logger.warning("No DATABASE_URL found, using file-based storage")
             return None
-        
-        conn = psycopg2.connect(database_url)
-        return conn
+
+        if _connection_pool is None:
+            # All DB work in a run shares one TCP/TLS session instead of
+            # paying a fresh handshake per helper call
+            _connection_pool = ThreadedConnectionPool(1, 4, database_url)
+        return _connection_pool.getconn()
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
         return None
 
+def release_database_connection(conn):
+    """Return a connection to the pool."""
+    if conn and _connection_pool:
+        _connection_pool.putconn(conn)
+
+def close_database_pool():
+    """Close all pooled connections at the end of a run."""
+    global _connection_pool
+    if _connection_pool:
+        _connection_pool.closeall()
+        _connection_pool = None
+
 def init_database():
     """Initialize database table."""
     conn = get_database_connection()
@@ -69,48 +114,47 @@ def init_database():
         logger.error(f"Database initialization failed: {e}")
         return False
     finally:
-        conn.close()
+        release_database_connection(conn)
 
-def get_previous_events():
-    """Get previous events from database."""
-    conn = get_database_connection()
-    if not conn:
-        return {}
-    
-    try:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("SELECT event_hash FROM previous_events")
-            rows = cur.fetchall()
-            return {row['event_hash']: True for row in rows}
-    except Exception as e:
-        logger.error(f"Error getting previous events: {e}")
-        return {}
-    finally:
-        conn.close()
+def record_new_events(events):
+    """Insert scraped events and return only the ones not seen before.
 
-def save_previous_events(events):
-    """Save events to database."""
+    Returns None when no database is available so the caller can fall back.
+    """
     conn = get_database_connection()
     if not conn:
-        return False
-    
+        return None
+
     try:
+        # ON CONFLICT skips hashes already stored (the UNIQUE constraint on
+        # event_hash backs this with a btree index), so RETURNING yields
+        # exactly the new events - detection and persistence in one
+        # batched round-trip
+        rows = [(get_event_hash(e), e['title'], e['date'], e['location'], e['url']) for e in events]
         with conn.cursor() as cur:
-            for event in events:
-                event_hash = get_event_hash(event)
-                cur.execute("""
-                    INSERT INTO previous_events (event_hash, title, date, location, url)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT (event_hash) DO NOTHING
-                """, (event_hash, event['title'], event['date'], event['location'], event['url']))
+            inserted = execute_values(cur, """
+                INSERT INTO previous_events (event_hash, title, date, location, url)
+                VALUES %s
+                ON CONFLICT (event_hash) DO NOTHING
+                RETURNING title, date, location, url
+            """, rows, page_size=500, fetch=True)
         conn.commit()
-        logger.info(f"Saved {len(events)} events to database")
-        return True
+
+        new_events = []
+        for title, date, location, url in inserted:
+            new_events.append({
+                'title': title,
+                'date': date,
+                'location': location,
+                'url': url
+            })
+            logger.info(f"New event found: {title}")
+        return new_events
     except Exception as e:
         logger.error(f"Error saving events: {e}")
-        return False
+        return None
     finally:
-        conn.close()
+        release_database_connection(conn)
 
 def cleanup_old_events(days_to_keep=30):
     """Delete events older than specified days."""
@@ -139,7 +183,18 @@ def cleanup_old_events(days_to_keep=30):
         logger.error(f"Error cleaning up old events: {e}")
         return False
     finally:
-        conn.close()
+        release_database_connection(conn)
+
+@lru_cache(maxsize=1)
+def get_chromedriver_path():
+    """Resolve the ChromeDriver path once per process."""
+    # CHROMEDRIVER_PATH skips webdriver-manager entirely (useful on platforms
+    # that pre-install a driver); otherwise resolve via webdriver-manager,
+    # which hits the network for version metadata, so do it only once
+    path = os.getenv('CHROMEDRIVER_PATH')
+    if path and os.path.exists(path):
+        return path
+    return ChromeDriverManager().install()
 
 def get_driver():
     """Get a Chrome WebDriver instance."""
@@ -150,71 +205,98 @@ def get_driver():
     chrome_options.add_argument('--disable-gpu')
     chrome_options.add_argument('--window-size=1920,1080')
     chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
-    
+    # Skip images - the scraper only reads text and links
+    chrome_options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+    # Return from driver.get() at DOMContentLoaded instead of waiting for every subresource
+    chrome_options.page_load_strategy = 'eager'
+
     try:
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
+        # keep_alive reuses one TCP connection for all WebDriver commands
+        # instead of reconnecting to chromedriver per command
+        service = Service(get_chromedriver_path())
+        driver = webdriver.Chrome(service=service, options=chrome_options, keep_alive=True)
         return driver
     except Exception as e:
         logger.error(f"Failed to create Chrome driver: {e}")
         return None
 
-def scrape_ikea_events(url, location_name):
-    """Scrape events from IKEA page using Selenium."""
-    driver = None
+def scrape_ikea_events(driver, url, location_name):
+    """Scrape events from IKEA page using the given WebDriver."""
     events = []
     seen_events = set()
-    
+
     try:
         logger.info(f"Scraping {location_name}: {url}")
-        
-        driver = get_driver()
-        if not driver:
-            return events
-            
+
         driver.get(url)
         
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.TAG_NAME, "body"))
-        )
-        
-        import time
-        time.sleep(5)
-        
         try:
-            event_elements = driver.find_elements(By.XPATH, "//*[contains(text(), 'BINGO') or contains(text(), 'Warehouse') or contains(text(), 'workshop') or contains(text(), 'class')]")
-            
-            for element in event_elements:
-                try:
-                    parent = element.find_element(By.XPATH, "./ancestor::li[1]")
-                    
-                    title_elem = parent.find_elements(By.TAG_NAME, "h3")
-                    date_elem = parent.find_elements(By.TAG_NAME, "p")
-                    link_elem = parent.find_elements(By.TAG_NAME, "a")
-                    
-                    if title_elem and link_elem:
-                        title = title_elem[0].text.strip()
-                        date = date_elem[0].text.strip() if date_elem else ""
-                        url = link_elem[0].get_attribute('href')
-                        
-                        if title and len(title) > 5:
-                            event_key = f"{title}|{date}|{url}"
-                            if event_key not in seen_events:
-                                seen_events.add(event_key)
-                                events.append({
-                                    'title': title,
-                                    'date': date,
-                                    'url': url,
-                                    'location': location_name
-                                })
-                                logger.info(f"Found event: {title}")
-                            
-                except Exception as e:
-                    continue
-                    
+            WebDriverWait(driver, 15).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "ul[aria-label^='All events at']"))
+            )
+        except TimeoutException:
+            logger.warning(f"Events list did not render for {location_name}, falling back to page scan")
+
+        try:
+            # Strategy 1: extract everything with one in-browser script call
+            for item in driver.execute_script(EXTRACT_EVENTS_JS):
+                title = (item.get('title') or '').strip()
+                date = (item.get('date') or '').strip()
+                url = item.get('url') or ''
+
+                if title and len(title) > 5:
+                    event_key = (title, date, url)
+                    if event_key not in seen_events:
+                        seen_events.add(event_key)
+                        events.append({
+                            'title': title,
+                            'date': date,
+                            'url': url,
+                            'location': location_name
+                        })
+                        logger.info(f"Found event: {title}")
+
         except Exception as e:
             logger.debug(f"Strategy 1 failed: {e}")
-        
+
+        if not events:
+            try:
+                # Top-down CSS query instead of a text-matching XPath scan of
+                # the whole DOM followed by per-element ancestor climbs
+                candidates = driver.find_elements(By.CSS_SELECTOR, "ul[aria-label^='All events at'] > li")
+
+                for candidate in candidates:
+                    try:
+                        if not EVENT_KEYWORD_RE.search(candidate.text):
+                            continue
+
+                        title_elem = candidate.find_elements(By.CSS_SELECTOR, "h3")
+                        date_elem = candidate.find_elements(By.CSS_SELECTOR, "p")
+                        link_elem = candidate.find_elements(By.CSS_SELECTOR, "a")
+
+                        if title_elem and link_elem:
+                            title = title_elem[0].text.strip()
+                            date = date_elem[0].text.strip() if date_elem else ""
+                            url = link_elem[0].get_attribute('href')
+
+                            if title and len(title) > 5:
+                                event_key = (title, date, url)
+                                if event_key not in seen_events:
+                                    seen_events.add(event_key)
+                                    events.append({
+                                        'title': title,
+                                        'date': date,
+                                        'url': url,
+                                        'location': location_name
+                                    })
+                                    logger.info(f"Found event: {title}")
+
+                    except Exception as e:
+                        continue
+
+            except Exception as e:
+                logger.debug(f"Strategy 2 failed: {e}")
+
         if not events:
             try:
                 event_links = driver.find_elements(By.XPATH, "//a[contains(@href, '/events/')]")
@@ -233,7 +315,7 @@ def scrape_ikea_events(url, location_name):
                             url = link.get_attribute('href')
                             
                             if title and len(title) > 5:
-                                event_key = f"{title}|{date}|{url}"
+                                event_key = (title, date, url)
                                 if event_key not in seen_events:
                                     seen_events.add(event_key)
                                     events.append({
@@ -248,34 +330,25 @@ def scrape_ikea_events(url, location_name):
                         continue
                         
             except Exception as e:
-                logger.debug(f"Strategy 2 failed: {e}")
-        
+                logger.debug(f"Strategy 3 failed: {e}")
+
         logger.info(f"Found {len(events)} unique events for {location_name}")
         return events
         
     except Exception as e:
         logger.error(f"Error scraping {location_name}: {e}")
         return events
-    finally:
-        if driver:
-            driver.quit()
 
 def get_event_hash(event):
     """Create a unique hash for an event."""
-    event_string = f"{event['title']}|{event['date']}|{event['location']}"
-    return hashlib.md5(event_string.encode()).hexdigest()
-
-def find_new_events(current_events, previous_events):
-    """Find events that are new since last check."""
-    new_events = []
-    
-    for event in current_events:
-        event_hash = get_event_hash(event)
-        if event_hash not in previous_events:
-            new_events.append(event)
-            logger.info(f"New event found: {event['title']}")
-    
-    return new_events
+    # digest_size=16 keeps the same 32-char hex width MD5 produced
+    h = hashlib.blake2b(digest_size=16)
+    h.update(event['title'].encode())
+    h.update(b'|')
+    h.update(event['date'].encode())
+    h.update(b'|')
+    h.update(event['location'].encode())
+    return h.hexdigest()
 
 def send_email(events):
     """Send email notification about events."""
@@ -296,20 +369,24 @@ def send_email(events):
         msg['To'] = ', '.join(recipient_emails)
         msg['Subject'] = f"IKEA Events Update - {len(events)} New Events"
         
-        body = f"Found {len(events)} NEW IKEA events:\n\n"
-        
+        # Accumulate parts and join once instead of growing a string per line
+        parts = [f"Found {len(events)} NEW IKEA events:\n\n"]
+
         for i, event in enumerate(events, 1):
-            body += f"Event {i}:\n"
-            body += f"Title: {event['title']}\n"
-            body += f"Date: {event['date']}\n"
-            body += f"Location: {event['location']}\n"
-            body += f"URL: {event['url']}\n"
-            body += "-" * 45 + "\n\n"
-        
+            parts.append(f"Event {i}:\n")
+            parts.append(f"Title: {event['title']}\n")
+            if event['date']:
+                parts.append(f"Date: {event['date']}\n")
+            parts.append(f"Location: {event['location']}\n")
+            parts.append(f"URL: {event['url']}\n")
+            parts.append(EMAIL_SEPARATOR)
+
+        body = "".join(parts)
+
         msg.attach(email.mime.text.MIMEText(body, 'plain'))
         
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
+        # Implicit TLS on 465 saves the STARTTLS round-trip of SMTP on 587
+        server = smtplib.SMTP_SSL('smtp.gmail.com', 465)
         server.login(sender_email, sender_password)
         server.send_message(msg, to_addrs=recipient_emails)
         server.quit()
@@ -339,32 +416,64 @@ def main():
         }
     ]
     
-    # Get previous events
-    previous_events = get_previous_events()
-    logger.info(f"Loaded {len(previous_events)} previous events from database")
-    
     all_events = []
-    
-    for location in locations:
-        events = scrape_ikea_events(location['url'], location['name'])
-        all_events.extend(events)
-    
+
+    # Warm the chromedriver cache before the pool starts: lru_cache does not
+    # serialize concurrent first calls, and two workers racing through
+    # ChromeDriverManager().install() on a cold cache can corrupt the binary
+    get_chromedriver_path()
+
+    # Each worker thread keeps one long-lived driver and reuses it for every
+    # location it scrapes, so Chrome cold-start is paid once per thread
+    thread_state = threading.local()
+    drivers = []
+    drivers_lock = threading.Lock()
+
+    def scrape_location(location):
+        driver = getattr(thread_state, 'driver', None)
+        if driver is None:
+            driver = get_driver()
+            if not driver:
+                return []
+            thread_state.driver = driver
+            with drivers_lock:
+                drivers.append(driver)
+        else:
+            # Avoid state leaking between locations on a reused driver
+            driver.delete_all_cookies()
+        return scrape_ikea_events(driver, location['url'], location['name'])
+
+    # Scrape locations concurrently - each worker thread owns its own driver
+    # and spends most of its time waiting on page load
+    try:
+        with ThreadPoolExecutor(max_workers=len(locations)) as executor:
+            for events in executor.map(scrape_location, locations):
+                all_events.extend(events)
+    finally:
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
     if all_events:
         logger.info(f"Found {len(all_events)} total events")
-        
-        # Find new events
-        new_events = find_new_events(all_events, previous_events)
-        
+
+        # Insert and detect new events in a single database round-trip
+        new_events = record_new_events(all_events)
+        if new_events is None:
+            # No database available - notify about everything we scraped
+            new_events = all_events
+
         if new_events:
             logger.info(f"Found {len(new_events)} NEW events")
             send_email(new_events)
-            
-            # Save all current events to database
-            save_previous_events(all_events)
         else:
             logger.info("No new events found - no email sent")
     else:
         logger.info("No events found")
 
+    close_database_pool()
+
 if __name__ == "__main__":
     main()
